@@ -2,30 +2,35 @@
 """Load environment variables from project.env for GitHub Actions and gcloud."""
 
 import os
+import re
 import sys
 from pathlib import Path
 
+# One KEY=VALUE assignment per line; comment lines and lines without "=" never match.
+# Groups: key, double-quoted value, single-quoted value, bare value.
+_ENV_LINE_RE = re.compile(
+    r"""^[^\S\n]*([^\s#=][^=\n]*?)[^\S\n]*=[^\S\n]*(?:"(.*)"|'(.*)'|(.*?))[^\S\n]*$""",
+    re.MULTILINE,
+)
+
 
 def parse_env_file(env_path: Path) -> dict[str, str]:
     """Parse a .env file into a dictionary."""
     if not env_path.is_file():
         raise FileNotFoundError(f"Missing {env_path}")
 
-    lines = env_path.read_text(encoding="utf-8").splitlines()
-    pairs = []
-    for line in lines:
-        line = line.strip()
-        if line and not line.startswith("#"):
-            parts = line.split("=", 1)
-            if len(parts) == 2:
-                key = parts[0].strip()
-                value = parts[1].strip()
-                # Remove surrounding quotes
-                if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
-                    value = value[1:-1]
-                if key:
-                    pairs.append((key, value))
-    return dict(pairs)
+    text = env_path.read_text(encoding="utf-8")
+    # Surrounding quotes are stripped by whichever value group matched
+    return {m[1]: m[2] or m[3] or m[4] or "" for m in _ENV_LINE_RE.finditer(text)}
+
+
+def append_to_file(path: Path, text: str) -> None:
+    """Append text to a file with a single write() call."""
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, text.encode("utf-8"))
+    finally:
+        os.close(fd)
 
 
 def write_to_github_env(env_vars: dict[str, str]) -> None:
@@ -35,15 +40,16 @@ def write_to_github_env(env_vars: dict[str, str]) -> None:
         print("Warning: GITHUB_ENV not set. Cannot export variables.")
         return
 
-    path = Path(github_env_path)
+    parts = []
+    for k, v in env_vars.items():
+        if "\n" in v:
+            delimiter = f"EOF_{k}_{os.urandom(4).hex()}"
+            parts.append(f"{k}<<{delimiter}\n{v}\n{delimiter}\n")
+        else:
+            parts.append(f"{k}={v}\n")
+
     try:
-        with path.open("a", encoding="utf-8") as f:
-            for k, v in env_vars.items():
-                if "\n" in v:
-                    delimiter = f"EOF_{k}_{os.urandom(4).hex()}"
-                    f.write(f"{k}<<{delimiter}\n{v}\n{delimiter}\n")
-                else:
-                    f.write(f"{k}={v}\n")
+        append_to_file(Path(github_env_path), "".join(parts))
     except OSError as e:
         print(f"Error writing to GITHUB_ENV: {e}")
 
@@ -57,12 +63,12 @@ def write_gcloud_env_string_to_output(env_vars: dict[str, str]) -> None:
 
     gcloud_env_string = ",".join(f"{k}={v}" for k, v in env_vars.items())
 
-    path = Path(github_output_path)
+    delimiter = f"EOF_GCLOUD_ENV_{os.urandom(4).hex()}"
     try:
-        with path.open("a", encoding="utf-8") as f:
-            delimiter = f"EOF_GCLOUD_ENV_{os.urandom(4).hex()}"
-            f.write(f"gcloud_env_string<<{delimiter}\n{gcloud_env_string}\n{delimiter}\n")
-            f.write("gcloud_vars_generated=true\n")
+        append_to_file(
+            Path(github_output_path),
+            f"gcloud_env_string<<{delimiter}\n{gcloud_env_string}\n{delimiter}\ngcloud_vars_generated=true\n",
+        )
     except OSError as e:
         print(f"Error writing to GITHUB_OUTPUT: {e}")
 
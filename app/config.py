@@ -14,6 +14,14 @@ class Settings(BaseSettings):
     :param port: Port to run the service on
     :param browser_timeout: Timeout for browser operations in milliseconds
     :param max_content_length: Maximum allowed HTML content length in bytes
+    :param pool_size: Number of pre-warmed browser contexts kept for reuse
+    :param pool_timeout: Seconds a request waits for a free pooled page before failing
+    :param browser_count: Number of Chromium instances the pool is spread across; not capped
+        automatically, so keep it within the container's CPU allocation
+    :param gzip_minimum_size: Responses smaller than this many bytes are sent uncompressed
+    :param gzip_compresslevel: gzip level for larger responses (1-9, low keeps CPU cost down)
+    :param browser_args: Extra Chromium command-line flags; the defaults skip GPU,
+        extension and background-service startup that PDF rendering doesn't need
     """
 
     app_name: str = "container-playwright-pdf"
@@ -21,6 +29,23 @@ class Settings(BaseSettings):
     port: int = 8080
     browser_timeout: int = 30000
     max_content_length: int = 10 * 1024 * 1024  # 10MB
+    pool_size: int = 2
+    pool_timeout: float = 30.0
+    browser_count: int = 1
+    gzip_minimum_size: int = 16384
+    gzip_compresslevel: int = 3
+    browser_args: list[str] = [
+        "--no-sandbox",
+        "--disable-dev-shm-usage",
+        "--disable-gpu",
+        "--disable-extensions",
+        "--disable-background-networking",
+        "--disable-default-apps",
+        "--disable-sync",
+        "--font-render-hinting=none",
+        "--hide-scrollbars",
+        "--mute-audio",
+    ]
 
     model_config = {"env_prefix": "PDF_"}
 
@@ -6,13 +6,18 @@ using Playwright/Chromium.
 
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
+from typing import Annotated
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import Response
-from playwright.async_api import TimeoutError as PlaywrightTimeout
 from loguru import logger as log
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+from pydantic import ValidationError
 
+from app.config import settings
 from app.models import PdfRequest
 from app.pdf_service import PdfService
 
@@ -62,6 +67,13 @@ app.add_middleware(
     allow_headers=["Content-Type"],
 )
 
+# Compress larger responses; small PDFs and JSON skip the CPU cost
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.gzip_minimum_size,
+    compresslevel=settings.gzip_compresslevel,
+)
+
 
 @app.get("/health")
 async def health() -> dict:
@@ -75,8 +87,54 @@ async def health() -> dict:
     }
 
 
-@app.post("/pdf")
-async def generate_pdf(request: PdfRequest) -> Response:
+async def parse_pdf_request(request: Request) -> PdfRequest:
+    """Parse and validate the raw JSON body in a single pydantic-core pass.
+
+    Skips FastAPI's intermediate ``json.loads`` dict, which matters for
+    multi-megabyte HTML payloads.
+
+    :param request: Incoming HTTP request
+    :returns: Validated PDF generation request
+    :raises RequestValidationError: If the body is not valid JSON or fails validation
+    """
+    try:
+        return PdfRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        ) from e
+
+
+def openapi() -> dict:
+    """Build the OpenAPI schema, adding the PdfRequest body model.
+
+    The body is parsed by parse_pdf_request, so FastAPI doesn't see the
+    model; its schemas are registered here for the route's requestBody.
+
+    :returns: OpenAPI schema
+    """
+    if app.openapi_schema is None:
+        schema = FastAPI.openapi(app)
+        request_schema = PdfRequest.model_json_schema(ref_template="#/components/schemas/{model}")
+        components = schema.setdefault("components", {}).setdefault("schemas", {})
+        components.update(request_schema.pop("$defs", {}))
+        components["PdfRequest"] = request_schema
+    return app.openapi_schema
+
+
+app.openapi = openapi
+
+
+@app.post(
+    "/pdf",
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/json": {"schema": {"$ref": "#/components/schemas/PdfRequest"}}},
+            "required": True,
+        }
+    },
+)
+async def generate_pdf(request: Annotated[PdfRequest, Depends(parse_pdf_request)]) -> Response:
     """Generate PDF from HTML content.
 
     :param request: PDF generation request with HTML and options
@@ -96,12 +154,19 @@ async def generate_pdf(request: PdfRequest) -> Response:
             status_code=504,
             detail="PDF generation timed out - HTML too large or complex"
         )
+    except TimeoutError:
+        # No pooled browser page became free within settings.pool_timeout
+        raise HTTPException(
+            status_code=503,
+            detail="PDF service is busy - retry later"
+        )
     except Exception as e:
-        log.error(f"PDF generation failed: {e}")
+        # Details go to the log only; the client gets a static message
+        log.exception("PDF generation failed")
         raise HTTPException(
             status_code=500,
-            detail=f"PDF generation failed: {str(e)}"
-        )
+            detail="PDF generation failed"
+        ) from e
 
     return Response(
         content=pdf_bytes,
@@ -3,30 +3,104 @@
 This module defines the request/response models for HTML-to-PDF conversion.
 """
 
-from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, Any, Literal, NamedTuple
 
+from pydantic import BaseModel, BeforeValidator, Field, StringConstraints, model_validator
+from pydantic.dataclasses import dataclass
+from pydantic_core import ArgsKwargs
 
-class PdfOptions(BaseModel):
+# Options that describe a paper page; giving any of them turns auto_size off by default
+_PAPER_KEYS = ("format", "landscape", "margin_top", "margin_bottom", "margin_left", "margin_right")
+
+
+def _blank_to_none(value: Any) -> Any:
+    """Treat an empty or whitespace-only margin as unset, as form-backed clients send it.
+
+    :param value: Raw margin value
+    :returns: None for blank strings, otherwise the value unchanged
+    """
+    if isinstance(value, str) and not value.strip():
+        return None
+    return value
+
+
+# A length as Playwright's page.pdf() parses it: optional sign, digits with an optional
+# fraction (".5" too) and a case-insensitive px/in/cm/mm unit; unitless values are pixels.
+# The pattern is published in the OpenAPI schema, so it avoids inline flags like (?i),
+# which ECMA-262 regexes don't support, and spells out the unit's case instead.
+# One alias for all four margin fields, so the pattern is defined once.
+MarginStr = Annotated[
+    Annotated[
+        str,
+        StringConstraints(
+            strip_whitespace=True,
+            pattern=r"^[+-]?([0-9]+(\.[0-9]*)?|\.[0-9]+)\s*([pP][xX]|[iI][nN]|[cC][mM]|[mM][mM])?$",
+        ),
+    ]
+    | None,
+    BeforeValidator(_blank_to_none),
+]
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class PdfOptions:
     """Options for PDF generation.
 
     :param format: Paper format (A4, Letter, Legal, etc.)
     :param landscape: Whether to use landscape orientation
     :param print_background: Whether to print background graphics
-    :param margin_top: Top margin (e.g., "1cm", "0.5in")
+    :param margin_top: Top margin (e.g., "1cm", "0.5in"; units px, in, cm or mm,
+        pixels when unitless; blank means unset)
     :param margin_bottom: Bottom margin
     :param margin_left: Left margin
     :param margin_right: Right margin
     :param scale: Scale of the webpage rendering (0.1 to 2)
+    :param wait_strategy: Load event to wait for after setting the HTML; use
+        "networkidle" when the HTML pulls fonts/images from external URLs
+    :param auto_size: Produce a single page sized to the content (the
+        ``.export-container`` element or the body) instead of using format/margins.
+        Left unset it is True, unless format, landscape or a margin is given
+
+    A slotted, frozen pydantic dataclass: instances carry no ``__dict__``
+    and are hashable, so they can be used as cache keys.
     """
 
     format: str = "A4"
     landscape: bool = False
     print_background: bool = True
-    margin_top: str | None = None
-    margin_bottom: str | None = None
-    margin_left: str | None = None
-    margin_right: str | None = None
+    margin_top: MarginStr = None
+    margin_bottom: MarginStr = None
+    margin_left: MarginStr = None
+    margin_right: MarginStr = None
     scale: float | None = None
+    wait_strategy: Literal["load", "domcontentloaded", "networkidle"] = "domcontentloaded"
+    auto_size: bool | None = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def _resolve_auto_size(cls, data: Any) -> Any:
+        """Default auto_size from whether any paper option was given.
+
+        :param data: Constructor arguments, or the raw mapping when validating input
+        :returns: The input with auto_size filled in
+        """
+        if isinstance(data, ArgsKwargs):
+            kwargs = _with_auto_size(dict(data.kwargs or {}))
+            return ArgsKwargs(data.args, kwargs)
+        if isinstance(data, dict):
+            return _with_auto_size(dict(data))
+        return data
+
+
+def _with_auto_size(values: dict) -> dict:
+    """Fill in a missing auto_size: True unless a non-blank paper option is present.
+
+    :param values: Option values keyed by field name (modified in place)
+    :returns: The same dictionary
+    """
+    if values.get("auto_size") is None:
+        values["auto_size"] = not any(_blank_to_none(values.get(key)) is not None for key in _PAPER_KEYS)
+    return values
 
 
 class PdfRequest(BaseModel):
@@ -36,21 +110,16 @@ class PdfRequest(BaseModel):
     :param options: Optional PDF generation options
     """
 
-    html: str = Field(..., min_length=1)
+    # The pattern rejects whitespace-only HTML without copying the string like str.strip()
+    html: str = Field(..., min_length=1, pattern=r"\S")
     options: PdfOptions | None = None
 
-    @field_validator("html")
-    @classmethod
-    def html_must_not_be_empty(cls, v: str) -> str:
-        """Validate that html is not empty or whitespace-only."""
-        if not v or not v.strip():
-            raise ValueError("html field cannot be empty")
-        return v
-
 
-class PdfResponse(BaseModel):
+class PdfResponse(NamedTuple):
     """Response model for PDF generation.
 
+    A plain NamedTuple: it is only built internally, so it needs no validation.
+
     :param success: Whether the PDF generation was successful
     :param message: Optional message with details
     """
@@ -4,59 +4,143 @@ This module provides the PdfService class for converting HTML to PDF
 using a headless Chromium browser via Playwright.
 """
 
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+from typing import TYPE_CHECKING, Any
+
 from loguru import logger as log
-from playwright.async_api import Browser, Playwright, async_playwright
+from pydantic import TypeAdapter
 
+from app.config import settings
 from app.models import PdfOptions
 
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    # Playwright is only imported at runtime by start(), keeping module import cheap
+    from playwright.async_api import Browser, BrowserContext, Page, Playwright
+
+# Large viewport so content isn't constrained while it is measured
+_VIEWPORT = {"width": 3000, "height": 3000}
+
+# Forces the export container to the origin and removes all page spacing
+_PIN_CSS = """
+    html, body {
+        margin: 0 !important;
+        padding: 0 !important;
+        width: auto !important;
+        height: auto !important;
+    }
+    .export-container {
+        position: absolute !important;
+        top: 0 !important;
+        left: 0 !important;
+        margin: 0 !important;
+    }
+"""
+
+# Registered on every pooled context. __fontsReady() waits for web fonts, but at most
+# 2 s so a stalled font request can't hold the page; __measure() also returns the
+# content bounds and then pins the content with _PIN_CSS
+_MEASURE_JS = """
+    window.__fontsReady = async () => {
+        if (document.fonts && document.fonts.ready) {
+            await Promise.race([
+                document.fonts.ready,
+                new Promise((resolve) => setTimeout(resolve, 2000)),
+            ]);
+        }
+    };
+    window.__measure = async () => {
+        await window.__fontsReady();
+        let dimensions;
+        const container = document.querySelector('.export-container');
+        if (container) {
+            dimensions = {
+                width: container.offsetWidth,
+                height: container.offsetHeight
+            };
+        } else {
+            // Fallback: measure actual content
+            const body = document.body;
+            dimensions = {
+                width: body.scrollWidth,
+                height: body.scrollHeight
+            };
+        }
+        const style = document.createElement('style');
+        style.textContent = __PIN_CSS__;
+        (document.head || document.documentElement).appendChild(style);
+        return dimensions;
+    };
+""".replace("__PIN_CSS__", json.dumps(_PIN_CSS))
+
+# Page geometry is derived from the content when auto-sizing, so these PdfOptions don't apply
+_AUTO_SIZE_IGNORED_KEYS = frozenset({"format", "landscape", "margin"})
+
+# Options for requests that send none; auto_size resolves to True, as for any request
+# that doesn't ask for a paper format
+_DEFAULT_OPTIONS = PdfOptions()
+
+# Built once; validates options passed as plain mappings
+_OPTIONS_ADAPTER = TypeAdapter(PdfOptions)
+
 
 class PdfService:
     """Service for generating PDFs from HTML content using Playwright.
 
     This service manages the browser lifecycle and provides PDF generation
-    capabilities. It can be injected with a mock Playwright instance for testing.
+    capabilities. Browser contexts are pre-warmed into a pool and reused across
+    requests; cookies and permissions are cleared between requests, but the
+    HTTP cache is shared by the requests a context serves. It can be injected
+    with a mock Playwright instance for testing.
 
     :param playwright: Optional Playwright instance for dependency injection
+    :ivar is_ready: True if the service has been started and is ready
     """
 
+    __slots__ = ("_playwright", "_browsers", "_pool", "_relaunch_lock", "_owns_playwright", "is_ready")
+
     def __init__(self, playwright: Playwright | None = None):
         """Initialize the PDF service.
 
         :param playwright: Optional Playwright instance (for testing)
         """
         self._playwright: Playwright | None = playwright
-        self._browser: Browser | None = None
+        self._browsers: list[Browser] = []
+        # A None entry is a slot whose context broke; _acquire() rebuilds it
+        self._pool: asyncio.Queue[tuple[BrowserContext, Page] | None] | None = None
+        # Serialises relaunches so concurrent slot rebuilds start only one browser
+        self._relaunch_lock = asyncio.Lock()
         self._owns_playwright: bool = playwright is None
-        self._is_ready: bool = playwright is not None
-
-    @property
-    def is_ready(self) -> bool:
-        """Check if the service is ready to process requests.
-
-        :returns: True if the service has been started and is ready
-        """
-        return self._is_ready
+        self.is_ready: bool = playwright is not None
 
     async def start(self) -> None:
         """Start the PDF service and launch the browser.
 
-        Initializes Playwright and launches a headless Chromium browser.
+        Initializes Playwright, launches a headless Chromium browser and
+        fills the context pool.
 
         :raises RuntimeError: If the service is already started
         """
-        if self._is_ready and not self._playwright:
+        if self.is_ready and not self._playwright:
             log.warning("PDF service already started")
             return
 
         log.info("Starting PDF service...")
 
         if self._owns_playwright:
+            from playwright.async_api import async_playwright
+
             playwright_context = async_playwright()
             self._playwright = await playwright_context.start()
 
         if self._playwright:
-            self._browser = await self._playwright.chromium.launch(headless=True)
-            self._is_ready = True
+            await self._launch_browsers()
+            self.is_ready = True
             log.info("PDF service started successfully")
 
     async def stop(self) -> None:
@@ -66,145 +150,266 @@ class PdfService:
         """
         log.info("Stopping PDF service...")
 
-        if self._browser:
-            await self._browser.close()
-            self._browser = None
+        await self._close_browsers()
 
         if self._owns_playwright and self._playwright:
             await self._playwright.stop()
             self._playwright = None
 
-        self._is_ready = False
+        self.is_ready = False
         log.info("PDF service stopped")
 
-    async def generate_pdf(self, html: str, options: PdfOptions | None = None) -> bytes:
+    async def generate_pdf(self, html: str, options: PdfOptions | Mapping[str, Any] | None = None) -> bytes:
         """Generate a PDF from HTML content.
 
         :param html: HTML content to convert to PDF
-        :param options: Optional PDF generation options
+        :param options: Optional PDF generation options, as PdfOptions or a plain mapping
         :returns: PDF content as bytes
         :raises RuntimeError: If the service is not started
+        :raises pydantic.ValidationError: If options is a mapping with invalid values
         :raises Exception: If PDF generation fails
         """
-        if not self._is_ready:
+        if not self.is_ready:
             raise RuntimeError("PDF service is not started or not ready")
 
         if options is None:
-            options = PdfOptions()
+            options = _DEFAULT_OPTIONS
+        elif not isinstance(options, PdfOptions):
+            options = _OPTIONS_ADAPTER.validate_python(options)
 
-        log.debug(f"Generating PDF with options: {options}")
+        log.debug("Generating PDF with options: {}", options)
 
-        # Get browser - either injected playwright or our own
-        if self._browser:
-            browser = self._browser
-        elif self._playwright:
-            browser = await self._playwright.chromium.launch(headless=True)
-        else:
-            raise RuntimeError("No browser available")
-
-        # Create a new context and page
-        context = await browser.new_context()
-        page = await context.new_page()
+        context, page = await self._acquire()
 
         try:
-            # Large viewport so content isn't constrained
-            await page.set_viewport_size({"width": 3000, "height": 3000})
-
-            # Set the HTML content
-            await page.set_content(html, wait_until="networkidle", timeout=180000)
-
-            # Get the exact content bounds
-            dimensions = await page.evaluate("""
-                () => {
-                    const container = document.querySelector('.export-container');
-                    if (container) {
-                        return {
-                            width: container.offsetWidth,
-                            height: container.offsetHeight
-                        };
-                    }
-                    // Fallback: measure actual content
-                    const body = document.body;
-                    return {
-                        width: body.scrollWidth,
-                        height: body.scrollHeight
-                    };
-                }
-            """)
-
-            page_width = dimensions['width']
-            page_height = dimensions['height']
-
-            log.debug(f"Content size: {page_width}x{page_height}")
-
-            # Force container to origin, remove all spacing
-            await page.add_style_tag(content="""
-                html, body {
-                    margin: 0 !important;
-                    padding: 0 !important;
-                    width: auto !important;
-                    height: auto !important;
-                }
-                .export-container {
-                    position: absolute !important;
-                    top: 0 !important;
-                    left: 0 !important;
-                    margin: 0 !important;
-                }
-            """)
-
-            # Set viewport to exact content size
-            await page.set_viewport_size({"width": page_width, "height": page_height})
-
-            # Wait for fonts
-            await page.evaluate(
-                "() => (document.fonts && document.fonts.ready) ? document.fonts.ready : Promise.resolve()"
-            )
-
-            # Generate PDF with exact content dimensions
-            pdf_bytes = await page.pdf(
-                width=f"{page_width}px",
-                height=f"{page_height}px",
-                print_background=True,
-                margin={"top": "0", "right": "0", "bottom": "0", "left": "0"},
-            )
-
-            log.debug(f"Generated PDF: {len(pdf_bytes)} bytes")
+            # Set the HTML content (the pooled context already has the large viewport)
+            await page.set_content(html, wait_until=options.wait_strategy, timeout=settings.browser_timeout)
+
+            if options.auto_size:
+                pdf_bytes = await self._pdf_fit_to_content(page, options)
+            else:
+                await page.evaluate("__fontsReady()")
+                pdf_bytes = await page.pdf(**_build_pdf_options_cached(options))
+
+            log.debug("Generated PDF: {} bytes", len(pdf_bytes))
             return pdf_bytes
 
         finally:
-            # Always close the page
-            await page.close()
-            await context.close()
+            # Always hand the context back to the pool
+            await self._release(context, page)
 
-    def _build_pdf_options(self, options: PdfOptions) -> dict:
-        """Build Playwright PDF options dictionary from PdfOptions model.
+    async def _pdf_fit_to_content(self, page: Page, options: PdfOptions) -> bytes:
+        """Print the page as a single PDF page sized exactly to its content.
 
-        :param options: PdfOptions model instance
-        :returns: Dictionary of options for Playwright's page.pdf()
+        :param page: Page with the HTML content already set
+        :param options: PDF generation options (paper format, orientation and margins are
+            ignored; scale also scales the page so the content still fits on it)
+        :returns: PDF content as bytes
         """
-        pdf_opts: dict = {
-            "format": options.format,
-            "landscape": options.landscape,
-            "print_background": options.print_background,
+        # Wait for fonts, get the exact content bounds and pin the content in one round-trip
+        dimensions = await page.evaluate("__measure()")
+
+        # Chromium lays the content out at page size / scale, so scaling the page
+        # keeps the measured content on exactly one page
+        scale = options.scale or 1
+        page_width = dimensions['width'] * scale
+        page_height = dimensions['height'] * scale
+
+        log.debug("Content size: {}x{} at scale {}", dimensions['width'], dimensions['height'], scale)
+
+        # Generate PDF with exact content dimensions; print layout follows the
+        # paper size, so the viewport doesn't need to be shrunk to the content
+        pdf_opts = {
+            key: value for key, value in _build_pdf_options_cached(options).items() if key not in _AUTO_SIZE_IGNORED_KEYS
         }
+        return await page.pdf(
+            **pdf_opts,
+            width=f"{page_width}px",
+            height=f"{page_height}px",
+            margin={"top": "0", "right": "0", "bottom": "0", "left": "0"},
+        )
+
+    async def _launch_browsers(self) -> None:
+        """Launch Chromium instances and pre-warm ``settings.pool_size`` contexts.
+
+        ``settings.browser_count`` browsers are launched in parallel and
+        contexts are spread across them round-robin, so concurrent requests
+        render in separate browser processes.
 
-        # Add margin options if specified
-        margin = {}
-        if options.margin_top:
-            margin["top"] = options.margin_top
-        if options.margin_bottom:
-            margin["bottom"] = options.margin_bottom
-        if options.margin_left:
-            margin["left"] = options.margin_left
-        if options.margin_right:
-            margin["right"] = options.margin_right
-
-        if margin:
-            pdf_opts["margin"] = margin
-
-        # Add scale if specified
-        if options.scale:
-            pdf_opts["scale"] = options.scale
-
-        return pdf_opts
+        :raises RuntimeError: If no Playwright instance is available
+        """
+        if not self._playwright:
+            raise RuntimeError("No browser available")
+
+        browser_count = max(1, settings.browser_count)
+
+        self._pool = asyncio.Queue()
+        # return_exceptions so the launches that did succeed can be closed on failure
+        launched = await asyncio.gather(
+            *(
+                self._playwright.chromium.launch(headless=True, args=settings.browser_args)
+                for _ in range(browser_count)
+            ),
+            return_exceptions=True,
+        )
+        self._browsers = [browser for browser in launched if not isinstance(browser, BaseException)]
+        try:
+            for result in launched:
+                if isinstance(result, BaseException):
+                    raise result
+            for i in range(settings.pool_size):
+                browser = self._browsers[i % browser_count]
+                self._pool.put_nowait(await self._new_pool_item(browser))
+        except BaseException:
+            await self._close_browsers()
+            raise
+
+    async def _close_browsers(self) -> None:
+        """Close every pooled page and context, then the browsers, and clear the pool."""
+        if self._pool is not None:
+            while not self._pool.empty():
+                item = self._pool.get_nowait()
+                if item is not None:
+                    context, page = item
+                    await _close_quietly(page)
+                    await _close_quietly(context)
+            self._pool = None
+
+        for browser in self._browsers:
+            await _close_quietly(browser)
+        self._browsers = []
+
+    async def _new_pool_item(self, browser: Browser) -> tuple[BrowserContext, Page]:
+        """Create a browser context with a single reusable page.
+
+        :param browser: Browser to open the context in
+        :returns: Tuple of the new context and its page
+        """
+        context = await browser.new_context(viewport=_VIEWPORT)
+        await context.add_init_script(script=_MEASURE_JS)
+        page = await context.new_page()
+        # Navigate once so the init script is installed before the first request
+        await page.goto("about:blank")
+        return context, page
+
+    async def _acquire(self) -> tuple[BrowserContext, Page]:
+        """Take a context/page pair from the pool, waiting if all are busy.
+
+        The browser is launched lazily when an injected Playwright instance
+        is used without calling start(). A slot whose context broke is
+        rebuilt here; if that fails the slot stays in the pool for the next
+        request.
+
+        :returns: Tuple of context and page
+        :raises TimeoutError: If no pooled page frees up within ``settings.pool_timeout``
+        """
+        if self._pool is None:
+            await self._launch_browsers()
+        item = await asyncio.wait_for(self._pool.get(), timeout=settings.pool_timeout)
+        if item is None:
+            try:
+                item = await self._new_pool_item(await self._connected_browser())
+            except BaseException:
+                self._pool.put_nowait(None)
+                raise
+        return item
+
+    async def _connected_browser(self) -> Browser:
+        """Return a browser that is still connected, relaunching one if all have died.
+
+        :returns: Connected browser to open a replacement context in
+        """
+        for browser in self._browsers:
+            if browser.is_connected():
+                return browser
+
+        async with self._relaunch_lock:
+            # Another request may have relaunched while this one waited for the lock
+            for browser in self._browsers:
+                if browser.is_connected():
+                    return browser
+
+            log.warning("All browsers disconnected, relaunching Chromium")
+            await _close_quietly(self._browsers[0])
+            browser = await self._playwright.chromium.launch(headless=True, args=settings.browser_args)
+            self._browsers[0] = browser
+            return browser
+
+    async def _release(self, context: BrowserContext, page: Page) -> None:
+        """Reset a context/page pair and return it to the pool.
+
+        The page is navigated to about:blank and the context's cookies and
+        granted permissions are cleared, so they don't carry over to the next
+        request; the HTTP cache is kept for the lifetime of the slot.
+
+        A page that can no longer navigate is discarded and its slot is
+        rebuilt by the next _acquire(). Never raises, so the caller's error
+        isn't masked and the slot is never lost.
+
+        :param context: Browser context taken from the pool
+        :param page: Page belonging to the context
+        """
+        if self._pool is None:
+            # Service was stopped while the request was in flight
+            await _close_quietly(context)
+            return
+
+        try:
+            await page.goto("about:blank")
+            await context.clear_cookies()
+            await context.clear_permissions()
+        except Exception as e:
+            log.warning("Discarding broken browser context: {}", e)
+            await _close_quietly(context)
+            self._pool.put_nowait(None)
+            return
+
+        self._pool.put_nowait((context, page))
+
+
+async def _close_quietly(closable: Browser | BrowserContext | Page) -> None:
+    """Close a browser, context or page, logging instead of raising if it is already gone.
+
+    :param closable: Browser, browser context or page to close
+    """
+    try:
+        await closable.close()
+    except Exception as e:
+        log.warning("Failed to close {}: {}", type(closable).__name__, e)
+
+
+@functools.lru_cache(maxsize=256)
+def _build_pdf_options_cached(options: PdfOptions) -> dict:
+    """Build Playwright PDF options dictionary from PdfOptions model.
+
+    Memoized on the frozen PdfOptions, so the result is shared between
+    calls and must not be mutated.
+
+    :param options: PdfOptions model instance
+    :returns: Dictionary of options for Playwright's page.pdf()
+    """
+    pdf_opts: dict = {
+        "format": options.format,
+        "landscape": options.landscape,
+        "print_background": options.print_background,
+    }
+
+    # Add margin options if specified
+    margin = {}
+    if options.margin_top:
+        margin["top"] = options.margin_top
+    if options.margin_bottom:
+        margin["bottom"] = options.margin_bottom
+    if options.margin_left:
+        margin["left"] = options.margin_left
+    if options.margin_right:
+        margin["right"] = options.margin_right
+
+    if margin:
+        pdf_opts["margin"] = margin
+
+    # Add scale if specified
+    if options.scale:
+        pdf_opts["scale"] = options.scale
+
+    return pdf_opts
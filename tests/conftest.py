@@ -1,9 +1,23 @@
 """Pytest fixtures for PDF service tests."""
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from fastapi.testclient import TestClient
+from playwright.async_api import Browser, BrowserContext, BrowserType, Page, Playwright
+
+
+def pytest_asyncio_loop_factories(config, item):
+    """Run async tests on uvloop, matching the service (``uvicorn --loop uvloop``).
+
+    Falls back to asyncio's default loop where uvloop isn't installed (Windows).
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return {"asyncio": asyncio.new_event_loop}
+    return {"uvloop": uvloop.new_event_loop}
 
 
 @pytest.fixture
@@ -21,6 +35,25 @@ def test_client():
         yield client
 
 
+@pytest.fixture
+def stub_client(monkeypatch):
+    """FastAPI test client backed by a stubbed PdfService.
+
+    The lifespan isn't run, so no browser is launched; the stub is exposed
+    as ``stub_client.pdf_service``.
+    """
+    import app.main
+    from app.pdf_service import PdfService
+
+    service = AsyncMock(spec=PdfService)
+    service.generate_pdf.return_value = b"%PDF-1.4 stub pdf content"
+    monkeypatch.setattr(app.main, "pdf_service", service)
+
+    client = TestClient(app.main.app)
+    client.pdf_service = service
+    return client
+
+
 @pytest.fixture
 def sample_html():
     """Sample HTML content for testing."""
@@ -52,48 +85,76 @@ def empty_html():
     return "<html><body></body></html>"
 
 
-@pytest.fixture
+def _configure_playwright_mocks(playwright, browser, context, page):
+    """Wire the mock Playwright objects together and set default return values."""
+    page.pdf.return_value = b"%PDF-1.4 mock pdf content"
+    page.evaluate.return_value = {"width": 800, "height": 600}
+    context.new_page.return_value = page
+    browser.new_context.return_value = context
+    playwright.chromium.launch.return_value = browser
+
+
+@pytest.fixture(scope="session")
 def mock_page():
-    """Mock Playwright page object."""
-    page = AsyncMock()
-    page.set_content = AsyncMock()
-    page.pdf = AsyncMock(return_value=b"%PDF-1.4 mock pdf content")
-    page.wait_for_load_state = AsyncMock()
-    page.close = AsyncMock()
-    return page
+    """Mock Playwright page object (shared, reset before every test).
 
+    Specced against Page, so its async methods are AsyncMocks and a
+    misspelt attribute raises AttributeError instead of passing silently.
+    """
+    return AsyncMock(spec=Page)
 
-@pytest.fixture
-def mock_browser_context(mock_page):
-    """Mock Playwright browser context."""
-    context = AsyncMock()
-    context.new_page = AsyncMock(return_value=mock_page)
-    context.close = AsyncMock()
-    return context
 
+@pytest.fixture(scope="session")
+def mock_browser_context():
+    """Mock Playwright browser context (shared, reset before every test)."""
+    return AsyncMock(spec=BrowserContext)
 
-@pytest.fixture
-def mock_browser(mock_browser_context):
-    """Mock Playwright browser for unit tests.
+
+@pytest.fixture(scope="session")
+def mock_browser():
+    """Mock Playwright browser for unit tests (shared, reset before every test).
 
     This fixture allows testing PDF generation logic without
     actually launching a browser.
     """
-    browser = AsyncMock()
-    browser.new_context = AsyncMock(return_value=mock_browser_context)
-    browser.close = AsyncMock()
-    return browser
+    return AsyncMock(spec=Browser)
 
 
-@pytest.fixture
-def mock_playwright(mock_browser):
-    """Mock Playwright instance."""
-    playwright = MagicMock()
-    playwright.chromium = MagicMock()
-    playwright.chromium.launch = AsyncMock(return_value=mock_browser)
+@pytest.fixture(scope="session")
+def mock_playwright():
+    """Mock Playwright instance (shared, reset before every test)."""
+    playwright = MagicMock(spec=Playwright)
+    playwright.chromium = MagicMock(spec=BrowserType)
     return playwright
 
 
+@pytest.fixture(autouse=True)
+def reset_playwright_mocks(mock_playwright, mock_browser, mock_browser_context, mock_page):
+    """Reset the session-scoped Playwright mocks so every test starts clean.
+
+    Building AsyncMocks is slow, so the mocks are created once per session
+    and only their calls, return values and side effects are reset here.
+    """
+    for mock in (mock_browser, mock_browser_context, mock_page):
+        mock.reset_mock(return_value=True, side_effect=True)
+    # A full reset would also reset MagicMock's __bool__, so only the launch mock is reset deeply
+    mock_playwright.reset_mock()
+    mock_playwright.chromium.launch.reset_mock(return_value=True, side_effect=True)
+    _configure_playwright_mocks(mock_playwright, mock_browser, mock_browser_context, mock_page)
+
+
+@pytest.fixture
+def pdf_service(mock_playwright):
+    """PdfService driven by the shared Playwright mocks.
+
+    Function-scoped: the service owns its page pool, so sharing it would
+    leak pooled pages and launch counts between tests.
+    """
+    from app.pdf_service import PdfService
+
+    return PdfService(playwright=mock_playwright)
+
+
 @pytest.fixture
 def pdf_request_data(sample_html):
     """Valid PDF request payload."""
@@ -5,6 +5,8 @@ These tests validate the API endpoints of the PDF service.
 
 import pytest
 
+from app.config import settings
+
 
 class TestHealthEndpoint:
     """Tests for GET /health endpoint."""
@@ -150,3 +152,73 @@ class TestPdfEndpointErrorHandling:
         # Detail should mention the missing field
         detail_str = str(body.get("detail"))
         assert "html" in detail_str.lower()
+
+
+class TestPdfRequestParsing:
+    """Tests for the POST /pdf body parsing and its OpenAPI contract (stubbed PdfService)."""
+
+    def test_openapi_documents_pdf_request_body(self, stub_client):
+        """The /pdf operation should document PdfRequest as its required JSON body."""
+        schema = stub_client.get("/openapi.json").json()
+
+        request_body = schema["paths"]["/pdf"]["post"]["requestBody"]
+        assert request_body["required"] is True
+        assert request_body["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/PdfRequest"}
+        assert {"PdfRequest", "PdfOptions"} <= schema["components"]["schemas"].keys()
+
+    def test_pdf_endpoint_passes_parsed_request_to_service(self, stub_client, sample_html):
+        """POST /pdf should hand the validated html and options to the service."""
+        response = stub_client.post("/pdf", json={"html": sample_html, "options": {"format": "Letter"}})
+
+        assert response.status_code == 200
+        assert response.content == b"%PDF-1.4 stub pdf content"
+        kwargs = stub_client.pdf_service.generate_pdf.call_args.kwargs
+        assert kwargs["html"] == sample_html
+        assert kwargs["options"].format == "Letter"
+
+    @pytest.mark.parametrize(
+        "body, loc, error_type",
+        [
+            ("{}", ["body", "html"], "missing"),
+            ("not valid json", ["body"], "json_invalid"),
+            ('{"html": "<p>x</p>", "options": {"scale": "large"}}', ["body", "options", "scale"], "float_parsing"),
+        ],
+    )
+    def test_pdf_endpoint_reports_validation_errors(self, stub_client, body, loc, error_type):
+        """Invalid bodies should get FastAPI's 422 shape with body-prefixed locations."""
+        response = stub_client.post("/pdf", content=body, headers={"Content-Type": "application/json"})
+
+        assert response.status_code == 422
+        error = response.json()["detail"][0]
+        assert error["loc"] == loc
+        assert error["type"] == error_type
+        stub_client.pdf_service.generate_pdf.assert_not_called()
+
+    def test_pdf_endpoint_hides_unexpected_error_details(self, stub_client, sample_html):
+        """An unexpected service error should return a static 500 without leaking its message."""
+        stub_client.pdf_service.generate_pdf.side_effect = Exception("secret")
+
+        response = stub_client.post("/pdf", json={"html": sample_html})
+
+        assert response.status_code == 500
+        assert response.json()["detail"] == "PDF generation failed"
+        assert "secret" not in response.text
+
+    def test_pdf_endpoint_returns_503_when_pool_is_busy(self, stub_client, sample_html):
+        """A request that times out waiting for a pooled page should get 503."""
+        stub_client.pdf_service.generate_pdf.side_effect = TimeoutError()
+
+        response = stub_client.post("/pdf", json={"html": sample_html})
+
+        assert response.status_code == 503
+
+    def test_pdf_endpoint_compresses_large_responses(self, stub_client, sample_html):
+        """PDFs of at least settings.gzip_minimum_size bytes should be gzipped when the client accepts it."""
+        pdf_bytes = b"%PDF-1.4 " + b"x" * settings.gzip_minimum_size
+        stub_client.pdf_service.generate_pdf.return_value = pdf_bytes
+
+        response = stub_client.post("/pdf", json={"html": sample_html}, headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.content == pdf_bytes
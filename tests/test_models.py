@@ -3,39 +3,40 @@
 These tests validate the request/response models for the PDF service API.
 """
 
+import dataclasses
+
 import pytest
 from pydantic import ValidationError
 
+from app.models import PdfOptions, PdfRequest, PdfResponse
+
 
 class TestPdfRequest:
     """Tests for PdfRequest model."""
 
     def test_pdf_request_requires_html(self):
         """PdfRequest must have an html field - missing html should raise ValidationError."""
-        from app.models import PdfRequest
-
         with pytest.raises(ValidationError, match="html"):
             PdfRequest()
 
     def test_pdf_request_accepts_html_string(self, sample_html):
         """PdfRequest accepts a valid HTML string."""
-        from app.models import PdfRequest
-
         request = PdfRequest(html=sample_html)
 
         assert request.html == sample_html
 
     def test_pdf_request_rejects_empty_html(self):
         """PdfRequest should reject empty string for html field."""
-        from app.models import PdfRequest
-
         with pytest.raises(ValidationError, match="html"):
             PdfRequest(html="")
 
+    def test_pdf_request_rejects_whitespace_only_html(self):
+        """PdfRequest should reject html consisting only of whitespace."""
+        with pytest.raises(ValidationError, match="html"):
+            PdfRequest(html=" \n\t ")
+
     def test_pdf_request_accepts_options(self, sample_html):
         """PdfRequest can include optional PdfOptions."""
-        from app.models import PdfOptions, PdfRequest
-
         options = PdfOptions(format="A4", landscape=True)
         request = PdfRequest(html=sample_html, options=options)
 
@@ -45,8 +46,6 @@ class TestPdfRequest:
 
     def test_pdf_request_options_default_none(self, sample_html):
         """PdfRequest options should default to None when not provided."""
-        from app.models import PdfRequest
-
         request = PdfRequest(html=sample_html)
 
         assert request.options is None
@@ -57,8 +56,6 @@ class TestPdfOptions:
 
     def test_pdf_options_defaults(self):
         """PdfOptions should have sensible defaults."""
-        from app.models import PdfOptions
-
         options = PdfOptions()
 
         assert options.format == "A4"
@@ -67,8 +64,6 @@ class TestPdfOptions:
 
     def test_pdf_options_format_accepts_valid_values(self):
         """PdfOptions format accepts standard paper sizes."""
-        from app.models import PdfOptions
-
         options_a4 = PdfOptions(format="A4")
         options_letter = PdfOptions(format="Letter")
         options_legal = PdfOptions(format="Legal")
@@ -79,8 +74,6 @@ class TestPdfOptions:
 
     def test_pdf_options_landscape_boolean(self):
         """PdfOptions landscape must be boolean."""
-        from app.models import PdfOptions
-
         options_portrait = PdfOptions(landscape=False)
         options_landscape = PdfOptions(landscape=True)
 
@@ -89,8 +82,6 @@ class TestPdfOptions:
 
     def test_pdf_options_margins(self):
         """PdfOptions accepts margin values."""
-        from app.models import PdfOptions
-
         options = PdfOptions(
             margin_top="2cm",
             margin_bottom="2cm",
@@ -103,22 +94,93 @@ class TestPdfOptions:
         assert options.margin_left == "1.5cm"
         assert options.margin_right == "1.5cm"
 
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("0.5in", "0.5in"),
+            (".5in", ".5in"),
+            ("1CM", "1CM"),
+            ("2Px", "2Px"),
+            ("-1cm", "-1cm"),
+            (" 1cm", "1cm"),
+            ("1 mm", "1 mm"),
+            ("10", "10"),
+            ("", None),
+            ("  ", None),
+        ],
+    )
+    def test_pdf_options_accepts_playwright_margins(self, value, expected):
+        """PdfOptions should accept every margin Playwright parses, treating blank as unset."""
+        options = PdfOptions(margin_left=value)
+
+        assert options.margin_left == expected
+
+    @pytest.mark.parametrize("value", ["1 banana", "cm", "1cm2", "."])
+    def test_pdf_options_rejects_invalid_margin(self, value):
+        """PdfOptions should reject margins Playwright can't parse."""
+        with pytest.raises(ValidationError, match="margin_left"):
+            PdfOptions(margin_left=value)
+
+    def test_pdf_options_schema_patterns_are_ecma_compatible(self):
+        """Patterns in the published JSON schema must not use inline flag groups, which ECMA-262 rejects."""
+        patterns = []
+
+        def collect(node):
+            if isinstance(node, dict):
+                if isinstance(node.get("pattern"), str):
+                    patterns.append(node["pattern"])
+                for value in node.values():
+                    collect(value)
+            elif isinstance(node, list):
+                for value in node:
+                    collect(value)
+
+        collect(PdfRequest.model_json_schema())
+
+        assert patterns
+        assert not [pattern for pattern in patterns if "(?" in pattern]
+
+    @pytest.mark.parametrize(
+        "options, expected",
+        [
+            ({}, True),
+            ({"wait_strategy": "networkidle"}, True),
+            ({"scale": 1.5, "print_background": False}, True),
+            ({"margin_top": ""}, True),
+            ({"format": "Letter"}, False),
+            ({"landscape": False}, False),
+            ({"margin_left": "1cm"}, False),
+            ({"format": "Letter", "auto_size": True}, True),
+            ({"auto_size": False}, False),
+        ],
+    )
+    def test_pdf_options_auto_size_default(self, sample_html, options, expected):
+        """auto_size should default to True unless a paper option is given, however the options arrive."""
+        request = PdfRequest.model_validate({"html": sample_html, "options": options})
+
+        assert request.options.auto_size is expected
+        assert PdfOptions(**options).auto_size is expected
+
     def test_pdf_options_scale(self):
         """PdfOptions accepts scale value between 0.1 and 2."""
-        from app.models import PdfOptions
-
         options = PdfOptions(scale=1.5)
 
         assert options.scale == 1.5
 
+    def test_pdf_options_frozen_and_hashable(self):
+        """PdfOptions should be immutable and usable as a cache key."""
+        options = PdfOptions(format="Letter")
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            options.format = "A4"
+        assert hash(options) == hash(PdfOptions(format="Letter"))
+
 
 class TestPdfResponse:
     """Tests for PdfResponse model."""
 
     def test_pdf_response_structure(self):
         """PdfResponse should have success status and optional message."""
-        from app.models import PdfResponse
-
         response = PdfResponse(success=True, message="PDF generated")
 
         assert response.success is True
@@ -126,15 +188,11 @@ class TestPdfResponse:
 
     def test_pdf_response_success_required(self):
         """PdfResponse requires success field."""
-        from app.models import PdfResponse
-
-        with pytest.raises(ValidationError, match="success"):
+        with pytest.raises(TypeError, match="success"):
             PdfResponse()
 
     def test_pdf_response_message_optional(self):
         """PdfResponse message should be optional."""
-        from app.models import PdfResponse
-
         response = PdfResponse(success=True)
 
         assert response.success is True
@@ -142,8 +200,6 @@ class TestPdfResponse:
 
     def test_pdf_response_error_state(self):
         """PdfResponse can represent error state."""
-        from app.models import PdfResponse
-
         response = PdfResponse(success=False, message="Failed to generate PDF")
 
         assert response.success is False
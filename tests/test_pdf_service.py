@@ -3,24 +3,37 @@
 These tests validate the PDF generation service logic.
 """
 
+import asyncio
+from unittest.mock import AsyncMock
+
 import pytest
+from playwright.async_api import Browser
+from pydantic import ValidationError
+
+from app.config import settings
+from app.models import PdfOptions
+from app.pdf_service import PdfService, _build_pdf_options_cached
 
 
 class TestPdfServiceGeneratePdf:
     """Tests for PdfService.generate_pdf() method."""
 
     @pytest.mark.asyncio
-    async def test_generate_pdf_returns_bytes(self, sample_html, mock_playwright):
+    async def test_generate_pdf_returns_bytes(self, sample_html, pdf_service):
         """generate_pdf should return bytes representing the PDF content."""
-        from app.pdf_service import PdfService
-
-        service = PdfService(playwright=mock_playwright)
-
-        result = await service.generate_pdf(sample_html)
+        result = await pdf_service.generate_pdf(sample_html)
 
         assert isinstance(result, bytes)
         assert len(result) > 0
 
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("options", [None, PdfOptions(format="Letter")])
+    async def test_generate_pdf_returns_buffer_without_copy(self, sample_html, pdf_service, mock_page, options):
+        """generate_pdf should return the buffer from page.pdf() itself, not a copy."""
+        result = await pdf_service.generate_pdf(sample_html, options=options)
+
+        assert result is mock_page.pdf.return_value
+
     @pytest.mark.asyncio
     async def test_generate_pdf_valid_pdf_header(self, sample_html, mock_page):
         """Generated PDF should start with valid PDF header magic bytes."""
@@ -35,76 +48,253 @@ class TestPdfServiceGeneratePdf:
         assert result.startswith(b"%PDF")
 
     @pytest.mark.asyncio
-    async def test_generate_pdf_waits_for_fonts(self, sample_html, mock_playwright, mock_page):
+    async def test_generate_pdf_waits_for_fonts(self, sample_html, pdf_service, mock_page):
         """generate_pdf should wait for fonts to load before generating PDF."""
-        from app.pdf_service import PdfService
-
-        service = PdfService(playwright=mock_playwright)
-
-        await service.generate_pdf(sample_html)
+        await pdf_service.generate_pdf(sample_html)
 
         # Verify that evaluate was called (for font waiting)
         mock_page.evaluate.assert_called()
 
     @pytest.mark.asyncio
-    async def test_generate_pdf_handles_empty_html(self, empty_html, mock_playwright):
-        """generate_pdf should handle empty HTML document gracefully."""
-        from app.pdf_service import PdfService
+    async def test_generate_pdf_measures_with_init_script(self, sample_html, pdf_service, mock_browser_context, mock_page):
+        """generate_pdf should measure content via the function registered on the context."""
+        await pdf_service.generate_pdf(sample_html)
 
-        service = PdfService(playwright=mock_playwright)
+        mock_browser_context.add_init_script.assert_called()
+        mock_page.evaluate.assert_called_once_with("__measure()")
 
-        result = await service.generate_pdf(empty_html)
+    @pytest.mark.asyncio
+    async def test_generate_pdf_handles_empty_html(self, empty_html, pdf_service):
+        """generate_pdf should handle empty HTML document gracefully."""
+        result = await pdf_service.generate_pdf(empty_html)
 
         assert isinstance(result, bytes)
 
     @pytest.mark.asyncio
-    async def test_generate_pdf_applies_options(self, sample_html, mock_playwright, mock_page):
+    async def test_generate_pdf_applies_options(self, sample_html, pdf_service, mock_page):
         """generate_pdf should generate PDF with content-adaptive dimensions."""
-        from app.pdf_service import PdfService
-
-        service = PdfService(playwright=mock_playwright)
-
-        await service.generate_pdf(sample_html)
+        await pdf_service.generate_pdf(sample_html)
 
         # Verify pdf() was called with width/height and print_background
         mock_page.pdf.assert_called()
         call_kwargs = mock_page.pdf.call_args.kwargs
-        assert "width" in call_kwargs
-        assert "height" in call_kwargs
+        assert call_kwargs["width"] == "800px"
+        assert call_kwargs["height"] == "600px"
         assert call_kwargs.get("print_background") is True
 
     @pytest.mark.asyncio
-    async def test_generate_pdf_sets_content_correctly(self, sample_html, mock_playwright, mock_page):
+    async def test_generate_pdf_uses_paper_format_without_auto_size(self, sample_html, pdf_service, mock_page):
+        """Explicit options without auto_size should print with the paper format and skip measuring."""
+        await pdf_service.generate_pdf(sample_html, options=PdfOptions(format="Letter", landscape=True))
+
+        mock_page.pdf.assert_called_once_with(format="Letter", landscape=True, print_background=True)
+        mock_page.evaluate.assert_called_once_with("__fontsReady()")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("options", [None, {}, {"wait_strategy": "networkidle"}])
+    async def test_generate_pdf_auto_sizes_without_paper_options(self, sample_html, pdf_service, mock_page, options):
+        """Options that don't ask for a paper format should keep the content-sized page."""
+        await pdf_service.generate_pdf(sample_html, options=options)
+
+        mock_page.evaluate.assert_called_once_with("__measure()")
+        assert "format" not in mock_page.pdf.call_args.kwargs
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_accepts_options_mapping(self, sample_html, pdf_service, mock_page):
+        """generate_pdf should validate options given as a plain dict."""
+        await pdf_service.generate_pdf(sample_html, options={"format": "Legal", "landscape": "true"})
+
+        mock_page.pdf.assert_called_once_with(format="Legal", landscape=True, print_background=True)
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_rejects_invalid_options_mapping(self, sample_html, pdf_service):
+        """generate_pdf should raise ValidationError for an invalid options dict."""
+        with pytest.raises(ValidationError, match="scale"):
+            await pdf_service.generate_pdf(sample_html, options={"scale": "large"})
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_does_not_revalidate_options(self, sample_html, pdf_service, mocker):
+        """PdfOptions validated at the API boundary should be used without re-validation."""
+        adapter = mocker.patch("app.pdf_service._OPTIONS_ADAPTER")
+
+        await pdf_service.generate_pdf(sample_html, options=PdfOptions(format="Letter"))
+
+        adapter.validate_python.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_keeps_pooled_viewport(self, sample_html, pdf_service, mock_page):
+        """generate_pdf should size the PDF via page.pdf() without resizing the viewport."""
+        await pdf_service.generate_pdf(sample_html)
+
+        mock_page.set_viewport_size.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_honors_background_and_scale(self, sample_html, pdf_service, mock_page):
+        """Content-sized PDFs should apply print_background and scale the page with the content."""
+        await pdf_service.generate_pdf(
+            sample_html, options=PdfOptions(format="Letter", print_background=False, scale=1.5, auto_size=True)
+        )
+
+        call_kwargs = mock_page.pdf.call_args.kwargs
+        assert call_kwargs["print_background"] is False
+        assert call_kwargs["scale"] == 1.5
+        # The 800x600 measurement is drawn 1.5x larger, so the page grows with it
+        assert call_kwargs["width"] == "1200.0px"
+        assert call_kwargs["height"] == "900.0px"
+        assert "format" not in call_kwargs
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_sets_content_correctly(self, sample_html, pdf_service, mock_page):
         """generate_pdf should set the HTML content on the page."""
-        from app.pdf_service import PdfService
+        await pdf_service.generate_pdf(sample_html)
+
+        mock_page.set_content.assert_called_once_with(sample_html, wait_until="domcontentloaded", timeout=settings.browser_timeout)
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_uses_wait_strategy_option(self, sample_html, pdf_service, mock_page):
+        """generate_pdf should wait for the load event requested in PdfOptions."""
+        await pdf_service.generate_pdf(sample_html, options=PdfOptions(wait_strategy="networkidle"))
 
-        service = PdfService(playwright=mock_playwright)
+        assert mock_page.set_content.call_args.kwargs["wait_until"] == "networkidle"
 
-        await service.generate_pdf(sample_html)
+    @pytest.mark.asyncio
+    async def test_generate_pdf_returns_page_to_pool(self, sample_html, pdf_service, mock_page):
+        """generate_pdf should reset the pooled page instead of closing it."""
+        await pdf_service.generate_pdf(sample_html)
+        mock_page.goto.reset_mock()
+        await pdf_service.generate_pdf(sample_html)
 
-        mock_page.set_content.assert_called_once_with(sample_html, wait_until="networkidle", timeout=180000)
+        mock_page.goto.assert_called_once_with("about:blank")
+        mock_page.close.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_generate_pdf_closes_page_after_generation(self, sample_html, mock_playwright, mock_page):
-        """generate_pdf should close the page after generating PDF."""
-        from app.pdf_service import PdfService
+    async def test_generate_pdf_clears_context_state_between_requests(self, sample_html, pdf_service, mock_browser_context):
+        """Cookies and permissions granted during a request should not reach the next one."""
+        await pdf_service.generate_pdf(sample_html)
 
-        service = PdfService(playwright=mock_playwright)
+        mock_browser_context.clear_cookies.assert_awaited_once()
+        mock_browser_context.clear_permissions.assert_awaited_once()
 
-        await service.generate_pdf(sample_html)
+    @pytest.mark.asyncio
+    async def test_generate_pdf_discards_context_that_cannot_be_cleared(self, sample_html, pdf_service, mock_browser, mock_browser_context):
+        """A context whose cookies can't be cleared should be closed and its slot rebuilt."""
+        await pdf_service.generate_pdf(sample_html)
+        mock_browser_context.clear_cookies.side_effect = Exception("Target closed")
+        await pdf_service.generate_pdf(sample_html)
+        mock_browser_context.clear_cookies.side_effect = None
+        mock_browser_context.close.assert_awaited_once()
 
-        mock_page.close.assert_called_once()
+        for _ in range(settings.pool_size):
+            await pdf_service.generate_pdf(sample_html)
+
+        assert mock_browser.new_context.call_count == settings.pool_size + 1
 
     @pytest.mark.asyncio
-    async def test_generate_pdf_handles_exception_gracefully(self, sample_html, mock_playwright, mock_page):
-        """generate_pdf should handle exceptions and clean up resources."""
-        from app.pdf_service import PdfService
+    async def test_generate_pdf_reuses_browser_contexts(self, sample_html, mock_playwright, pdf_service, mock_browser):
+        """Repeated generate_pdf calls should not create new contexts or browsers."""
+        await pdf_service.generate_pdf(sample_html)
+        await pdf_service.generate_pdf(sample_html)
+        await pdf_service.generate_pdf(sample_html)
 
+        mock_playwright.chromium.launch.assert_called_once()
+        assert mock_browser.new_context.call_count == settings.pool_size
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_launches_with_configured_args(self, sample_html, mock_playwright, pdf_service):
+        """Chromium should be launched headless with the flags from settings."""
+        await pdf_service.generate_pdf(sample_html)
+
+        mock_playwright.chromium.launch.assert_called_once_with(headless=True, args=settings.browser_args)
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_spreads_pool_across_browsers(self, sample_html, mock_playwright, pdf_service, mock_browser, monkeypatch):
+        """Pooled contexts should be spread across settings.browser_count browsers."""
+        monkeypatch.setattr(settings, "browser_count", 2)
+        monkeypatch.setattr(settings, "pool_size", 4)
+
+        await pdf_service.generate_pdf(sample_html)
+
+        assert mock_playwright.chromium.launch.call_count == 2
+        assert mock_browser.new_context.call_count == 4
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_keeps_pool_slots_when_browser_dies(self, sample_html, pdf_service, mock_page, mock_browser):
+        """A dead browser should fail requests with the original error and not drain the pool."""
+        await pdf_service.generate_pdf(sample_html)
+        mock_page.pdf.side_effect = Exception("Target closed")
+        mock_page.goto.side_effect = Exception("Target closed")
+        mock_browser.new_context.side_effect = Exception("Browser closed")
+
+        for _ in range(settings.pool_size + 1):
+            with pytest.raises(Exception, match="Target closed|Browser closed"):
+                await asyncio.wait_for(pdf_service.generate_pdf(sample_html), timeout=1)
+
+        mock_page.pdf.side_effect = None
+        mock_page.goto.side_effect = None
+        mock_browser.new_context.side_effect = None
+        for _ in range(settings.pool_size):
+            assert await asyncio.wait_for(pdf_service.generate_pdf(sample_html), timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_relaunches_disconnected_browser(self, sample_html, pdf_service, mock_playwright, mock_page, mock_browser):
+        """Rebuilding a broken slot should relaunch Chromium when no browser is connected."""
+        await pdf_service.generate_pdf(sample_html)
+        mock_page.goto.side_effect = Exception("Target closed")
+        await pdf_service.generate_pdf(sample_html)
+        mock_page.goto.side_effect = None
+        mock_browser.is_connected.return_value = False
+
+        for _ in range(settings.pool_size):
+            await pdf_service.generate_pdf(sample_html)
+
+        assert mock_playwright.chromium.launch.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_relaunches_once_for_concurrent_rebuilds(
+        self, sample_html, pdf_service, mock_playwright, mock_page, mock_browser, mock_browser_context
+    ):
+        """Slots rebuilt concurrently after every browser died should share a single relaunch."""
+        held = [await pdf_service._acquire() for _ in range(settings.pool_size)]
+        mock_page.goto.side_effect = Exception("Target closed")
+        for context, page in held:
+            await pdf_service._release(context, page)
+        mock_page.goto.side_effect = None
+        mock_browser.is_connected.return_value = False
+
+        launched = []
+
+        async def launch(**kwargs):
+            await asyncio.sleep(0)
+            browser = AsyncMock(spec=Browser)
+            browser.is_connected.return_value = True
+            browser.new_context.return_value = mock_browser_context
+            launched.append(browser)
+            return browser
+
+        mock_playwright.chromium.launch.side_effect = launch
+        await asyncio.gather(*(pdf_service.generate_pdf(sample_html) for _ in range(settings.pool_size)))
+        await pdf_service.stop()
+
+        assert len(launched) == 1
+        launched[0].close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_fails_fast_when_pool_is_drained(self, sample_html, pdf_service, monkeypatch):
+        """generate_pdf should raise TimeoutError instead of waiting forever for a pooled page."""
+        monkeypatch.setattr(settings, "pool_timeout", 0.01)
+        for _ in range(settings.pool_size):
+            await pdf_service._acquire()
+
+        with pytest.raises(TimeoutError):
+            await pdf_service.generate_pdf(sample_html)
+
+    @pytest.mark.asyncio
+    async def test_generate_pdf_handles_exception_gracefully(self, sample_html, pdf_service, mock_page):
+        """generate_pdf should handle exceptions and clean up resources."""
         mock_page.pdf.side_effect = Exception("Browser crashed")
-        service = PdfService(playwright=mock_playwright)
 
         with pytest.raises(Exception, match="Browser crashed"):
-            await service.generate_pdf(sample_html)
+            await pdf_service.generate_pdf(sample_html)
 
 
 class TestPdfServiceLifecycle:
@@ -113,8 +303,6 @@ class TestPdfServiceLifecycle:
     @pytest.mark.asyncio
     async def test_service_can_be_started(self, mock_playwright):
         """PdfService should have a start method for initialization."""
-        from app.pdf_service import PdfService
-
         service = PdfService()
 
         # Service should be startable
@@ -125,8 +313,6 @@ class TestPdfServiceLifecycle:
     @pytest.mark.asyncio
     async def test_service_can_be_stopped(self, mock_playwright):
         """PdfService should have a stop method for cleanup."""
-        from app.pdf_service import PdfService
-
         service = PdfService()
         await service.start()
 
@@ -134,12 +320,62 @@ class TestPdfServiceLifecycle:
 
         assert not service.is_ready
 
+    @pytest.mark.asyncio
+    async def test_service_stop_closes_pooled_pages(self, sample_html, pdf_service, mock_page, mock_browser_context):
+        """PdfService.stop should close every pooled page and context."""
+        await pdf_service.generate_pdf(sample_html)
+
+        await pdf_service.stop()
+
+        mock_page.close.assert_called()
+        mock_browser_context.close.assert_called()
+
+    @pytest.mark.asyncio
+    async def test_service_closes_launched_browsers_when_startup_fails(self, sample_html, pdf_service, mock_playwright, mock_browser, monkeypatch):
+        """A failed launch should close the browsers and contexts that did start."""
+        monkeypatch.setattr(settings, "browser_count", 2)
+        mock_playwright.chromium.launch.side_effect = [mock_browser, Exception("launch failed")]
+
+        with pytest.raises(Exception, match="launch failed"):
+            await pdf_service.generate_pdf(sample_html)
+
+        mock_browser.close.assert_called_once()
+        mock_browser.new_context.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_service_closes_contexts_when_pool_fill_fails(self, sample_html, pdf_service, mock_browser, mock_browser_context, mock_page):
+        """A context that fails to warm up should not leak the contexts already pooled."""
+        mock_page.goto.side_effect = [None, Exception("navigation failed")]
+
+        with pytest.raises(Exception, match="navigation failed"):
+            await pdf_service.generate_pdf(sample_html)
+
+        mock_browser_context.close.assert_called_once()
+        mock_browser.close.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_service_rejects_requests_when_not_started(self, sample_html):
         """PdfService should reject requests when not started."""
-        from app.pdf_service import PdfService
-
         service = PdfService()
 
         with pytest.raises(RuntimeError, match="not started|not ready"):
             await service.generate_pdf(sample_html)
+
+
+class TestBuildPdfOptions:
+    """Tests for the _build_pdf_options_cached helper."""
+
+    def test_build_pdf_options_maps_margins_and_scale(self):
+        """_build_pdf_options_cached should map margins and scale to Playwright options."""
+        pdf_opts = _build_pdf_options_cached(PdfOptions(format="Letter", margin_top="1cm", margin_left="2cm", scale=1.5))
+
+        assert pdf_opts["format"] == "Letter"
+        assert pdf_opts["margin"] == {"top": "1cm", "left": "2cm"}
+        assert pdf_opts["scale"] == 1.5
+
+    def test_build_pdf_options_cached_for_equal_options(self):
+        """Equal PdfOptions should share one cached options dictionary."""
+        first = _build_pdf_options_cached(PdfOptions(format="Legal", landscape=True))
+        second = _build_pdf_options_cached(PdfOptions(format="Legal", landscape=True))
+
+        assert first is second